@@ -12,3 +12,13 @@ class CheckResponseException(Exception):
 
 class ParseStatusException(Exception):
     pass
+
+
+class CircuitOpenException(Exception):
+    pass
+
+
+class RetryAfterException(GetAPIAnswerException):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
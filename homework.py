@@ -1,15 +1,38 @@
+import atexit
+import functools
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import statistics
 import sys
 import time
+from collections import Counter, OrderedDict, defaultdict, deque
+from email.utils import formatdate
 from http import HTTPStatus
 
 import requests
 import telegram
-from dotenv import load_dotenv
+from dotenv import dotenv_values, load_dotenv
+from ratelimit import limits, sleep_and_retry
+from telegram.ext import Updater
+
+try:
+    import orjson
+except ImportError:
+    import json as orjson
 
 import exceptions
-from settings import ENDPOINT, HOMEWORK_STATUSES, RETRY_TIME
+from settings import (API_RETRY_ATTEMPTS, BACKOFF_JITTER, BACKOFF_MAX_DELAY,
+                      CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT,
+                      CONNECT_TIMEOUT, ENDPOINT, ERROR_DEDUP_SIZE,
+                      ERROR_DEDUP_WINDOW, HOMEWORK_STATUSES,
+                      LATENCY_REPORT_EVERY, LATENCY_WINDOW, POOL_CONNECTIONS,
+                      POOL_MAXSIZE, READ_TIMEOUT, RESPONSE_CACHE_TTL,
+                      RETRIABLE_STATUSES, RETRY_DELAY_MAX, RETRY_DELAY_MIN,
+                      RETRY_TIME, TELEGRAM_CHAT_INTERVAL,
+                      TELEGRAM_RATE_LIMIT_CALLS, TELEGRAM_RATE_LIMIT_PERIOD)
 
 load_dotenv()
 
@@ -17,13 +40,41 @@ PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+SESSION = requests.Session()
+SESSION.mount(
+    'https://',
+    requests.adapters.HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+    )
+)
+
+_LAST_RESPONSE = None
+_LAST_TS = 0
+
+_MISSING = object()
+
+_LATENCIES = defaultdict(functools.partial(deque, maxlen=LATENCY_WINDOW))
+_CALLS = Counter()
+
+_LAST_SEND_TS = {}
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    filename='./homework_log.log',
-    format='%(asctime)s [%(levelname)s] %(message)s',
+_RECENT_ERRORS = OrderedDict()
+
+_cb = {'state': 'CLOSED', 'fails': 0, 'opened_at': 0}
+
+log_queue = queue.Queue(-1)
+file_handler = logging.FileHandler('./homework_log.log')
+file_handler.setFormatter(
+    logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
 )
+listener = logging.handlers.QueueListener(log_queue, file_handler)
+listener.start()
+atexit.register(listener.stop)
+
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -31,56 +82,225 @@ handler = logging.StreamHandler(stream=sys.stdout)
 logger.addHandler(handler)
 
 
+def record_latency(name, duration):
+    """Сохраняет длительность вызова и периодически логирует перцентили."""
+    latencies = _LATENCIES[name]
+    latencies.append(duration)
+    _CALLS[name] += 1
+    if _CALLS[name] % LATENCY_REPORT_EVERY:
+        return
+    percentiles = statistics.quantiles(latencies, n=100)
+    logger.info(
+        'Задержка %s: p50=%.3fs, p95=%.3fs, p99=%.3fs',
+        name, percentiles[49], percentiles[94], percentiles[98]
+    )
+
+
+def timed(name):
+    """Декоратор, замеряющий длительность вызова функции."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_latency(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def wait_chat_interval(chat_id):
+    """Выдерживает паузу между сообщениями в один и тот же чат."""
+    elapsed = time.monotonic() - _LAST_SEND_TS.get(chat_id, float('-inf'))
+    if elapsed < TELEGRAM_CHAT_INTERVAL:
+        time.sleep(TELEGRAM_CHAT_INTERVAL - elapsed)
+    _LAST_SEND_TS[chat_id] = time.monotonic()
+
+
+@timed('telegram_send')
+def deliver_message(bot, message):
+    """Передаёт сообщение в Telegram без ограничения частоты."""
+    return bot.send_message(TELEGRAM_CHAT_ID, message)
+
+
+@sleep_and_retry
+@limits(calls=TELEGRAM_RATE_LIMIT_CALLS, period=TELEGRAM_RATE_LIMIT_PERIOD)
 def send_message(bot, message):
     """Отправляет сообщение в Telegram чат."""
+    wait_chat_interval(TELEGRAM_CHAT_ID)
     try:
-        logger.info(f'Бот отправил сообщение: "{message}"')
-        return bot.send_message(TELEGRAM_CHAT_ID, message)
+        logger.info('Бот отправил сообщение: "%s"', message)
+        return deliver_message(bot, message)
     except telegram.error.TelegramError as error:
-        logger.error(f'Боту не удалось отправить сообщение: "{error}"')
+        logger.error('Боту не удалось отправить сообщение: "%s"', error)
         raise exceptions.SendMessageException(error)
 
 
-def get_api_answer(current_timestamp):
-    """Делает запрос к эндпоинту API сервиса Практикум.Домашка."""
-    timestamp = current_timestamp or int(time.time())
-    params = {'from_date': timestamp}
-    try:
-        homework_statuses = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params=params
-        )
-    except Exception as error:
-        message = f'Эндпоинт {ENDPOINT} недоступен: {error}'
+def parse_retry_after(response):
+    """Возвращает паузу из заголовка Retry-After ответа 429, если она есть."""
+    if response.status_code != HTTPStatus.TOO_MANY_REQUESTS:
+        return None
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return int(retry_after)
+    return None
+
+
+def retry_delay(attempt, response=None):
+    """Считает паузу перед повторным запросом к API."""
+    if response is not None:
+        retry_after = parse_retry_after(response)
+        if retry_after is not None:
+            return retry_after
+    return random.uniform(RETRY_DELAY_MIN, RETRY_DELAY_MAX) * attempt
+
+
+def check_circuit():
+    """Не пропускает запрос к API, пока предохранитель разомкнут."""
+    if _cb['state'] != 'OPEN':
+        return
+    if time.time() - _cb['opened_at'] < CIRCUIT_RESET_TIMEOUT:
+        message = f'Запросы к {ENDPOINT} приостановлены после серии сбоев'
         logger.error(message)
-        raise exceptions.GetAPIAnswerException(message)
+        raise exceptions.CircuitOpenException(message)
+    _cb['state'] = 'HALF_OPEN'
+
+
+def record_api_result(success):
+    """Обновляет состояние предохранителя по итогу запроса к API."""
+    if success:
+        _cb.update(state='CLOSED', fails=0)
+        return
+    _cb['fails'] += 1
+    if (_cb['state'] == 'HALF_OPEN'
+            or _cb['fails'] >= CIRCUIT_FAILURE_THRESHOLD):
+        _cb.update(state='OPEN', opened_at=time.time())
+        logger.warning(
+            'Предохранитель разомкнут после %s сбоев подряд', _cb['fails']
+        )
+
+
+def request_api(params, headers):
+    """Запрашивает API и учитывает результат в предохранителе.
+
+    В полуоткрытом состоянии делается ровно одна пробная попытка.
+    """
+    attempts = 1 if _cb['state'] == 'HALF_OPEN' else API_RETRY_ATTEMPTS
+    try:
+        response = request_with_retries(params, headers, attempts)
+    except Exception:
+        record_api_result(False)
+        raise
+    record_api_result(
+        response.status_code in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED)
+    )
+    return response
+
+
+@timed('api_request')
+def fetch_homework_statuses(params, headers):
+    """Делает одиночный запрос к API без повторов."""
+    return SESSION.get(
+        ENDPOINT,
+        headers=headers,
+        params=params,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+    )
+
+
+def request_with_retries(params, headers, attempts=API_RETRY_ATTEMPTS):
+    """Запрашивает API, повторяя запрос только при временных сбоях."""
+    for attempt in range(1, attempts + 1):
+        try:
+            response = fetch_homework_statuses(params, headers)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if attempt == attempts:
+                raise
+            logger.warning('Эндпоинт %s недоступен: %s', ENDPOINT, error)
+            time.sleep(retry_delay(attempt))
+            continue
+        if (response.status_code not in RETRIABLE_STATUSES
+                or attempt == attempts):
+            return response
+        retry_after = parse_retry_after(response)
+        if retry_after is not None and retry_after > RETRY_DELAY_MAX:
+            return response
+        logger.warning('Код ответа API: %s', response.status_code)
+        time.sleep(retry_delay(attempt, response))
+
+
+def get_cached_response():
+    """Возвращает последний успешный ответ API, если он ещё не устарел."""
+    if time.time() - _LAST_TS < RESPONSE_CACHE_TTL:
+        return _LAST_RESPONSE
+    return None
+
+
+def decode_response(homework_statuses, current_timestamp):
+    """Преобразует ответ API в словарь; 304 означает, что изменений нет."""
+    if homework_statuses.status_code == HTTPStatus.NOT_MODIFIED:
+        return {'homeworks': [], 'current_date': current_timestamp}
     if homework_statuses.status_code != HTTPStatus.OK:
         message = f'Код ответа API: {homework_statuses.status_code}'
         logger.error(message)
+        retry_after = parse_retry_after(homework_statuses)
+        if retry_after is not None:
+            raise exceptions.RetryAfterException(message, retry_after)
         raise exceptions.GetAPIAnswerException(message)
     try:
-        return homework_statuses.json()
-    except Exception as error:
+        return orjson.loads(homework_statuses.content)
+    except ValueError as error:
         message = f'Ошибка преобразования к формату json: {error}'
         logger.error(message)
-        raise exceptions.GetAPIAnswerException(message)
+        raise exceptions.GetAPIAnswerException(message) from error
+
+
+def get_api_answer(current_timestamp):
+    """Делает запрос к эндпоинту API сервиса Практикум.Домашка."""
+    global _LAST_RESPONSE, _LAST_TS
+    params = {'from_date': current_timestamp}
+    headers = {
+        'Authorization': f'OAuth {PRACTICUM_TOKEN}',
+        'If-Modified-Since': formatdate(current_timestamp, usegmt=True),
+    }
+    check_circuit()
+    try:
+        homework_statuses = request_api(params, headers)
+    except (requests.ConnectionError, requests.Timeout) as error:
+        cached_response = get_cached_response()
+        if cached_response is None:
+            message = f'Эндпоинт {ENDPOINT} недоступен: {error}'
+            logger.error(message)
+            raise exceptions.GetAPIAnswerException(message) from error
+        logger.warning(
+            'Эндпоинт %s недоступен: %s. Используется сохранённый ответ',
+            ENDPOINT, error
+        )
+        return cached_response
+    except Exception as error:
+        message = f'Эндпоинт {ENDPOINT} недоступен: {error}'
+        logger.error(message)
+        raise exceptions.GetAPIAnswerException(message) from error
+    response = decode_response(homework_statuses, current_timestamp)
+    _LAST_RESPONSE, _LAST_TS = response, time.time()
+    return response
 
 
 def check_response(response):
     """Проверяет корректность данных, запрошенных от API Практикум.Домашка."""
-    if type(response) != dict:
+    if not isinstance(response, dict):
         message = \
             f'Тип данных в ответе от API не соотвествует ожидаемому.' \
             f' Получен: {type(response)}'
         logger.error(message)
         raise TypeError(message)
-    if 'homeworks' not in response:
+    homeworks_list = response.get('homeworks', _MISSING)
+    if homeworks_list is _MISSING:
         message = 'Ключ homeworks недоступен'
         logger.error(message)
         raise exceptions.CheckResponseException(message)
-    homeworks_list = response['homeworks']
-    if type(homeworks_list) != list:
+    if not isinstance(homeworks_list, list):
         message = \
             f'В ответе от API домашки приходят не в виде списка. ' \
             f'Получен: {type(homeworks_list)}'
@@ -91,25 +311,48 @@ def check_response(response):
 
 def parse_status(homework):
     """Извлекает из информации о конкретной домашке её статус."""
-    if 'homework_name' not in homework:
+    homework_name = homework.get('homework_name')
+    if homework_name is None:
         message = 'Ключ homework_name недоступен'
         logger.error(message)
         raise KeyError(message)
-    if 'status' not in homework:
+    homework_status = homework.get('status')
+    if homework_status is None:
         message = 'Ключ status недоступен'
         logger.error(message)
         raise KeyError(message)
-    homework_name = homework['homework_name']
-    homework_status = homework['status']
-    if homework_status in HOMEWORK_STATUSES:
-        verdict = HOMEWORK_STATUSES[homework_status]
-        return f'Изменился статус проверки работы ' \
-               f'"{homework_name}". {verdict}'
-    else:
+    verdict = HOMEWORK_STATUSES.get(homework_status)
+    if verdict is None:
         message = \
             f'Передан неизвестный статус домашней работы "{homework_status}"'
         logger.error(message)
         raise exceptions.ParseStatusException(message)
+    return f'Изменился статус проверки работы ' \
+           f'"{homework_name}". {verdict}'
+
+
+def backoff_delay(attempt):
+    """Считает паузу перед повтором после сбоя: экспонента с джиттером.
+
+    Отсчёт идёт от RETRY_TIME, поэтому при сбоях бот опрашивает API
+    не чаще, чем в штатном режиме.
+    """
+    delay = RETRY_TIME * (2 ** attempt)
+    delay *= 1 + random.uniform(0, BACKOFF_JITTER)
+    return min(BACKOFF_MAX_DELAY, delay)
+
+
+def reload_practicum_token():
+    """Перечитывает PRACTICUM_TOKEN из .env без перезапуска бота.
+
+    Из файла берётся только этот токен, и только если он там задан:
+    остальные переменные окружения, например заданные платформой
+    развёртывания, не перезаписываются.
+    """
+    global PRACTICUM_TOKEN
+    token = dotenv_values().get('PRACTICUM_TOKEN')
+    if token:
+        PRACTICUM_TOKEN = token
 
 
 def check_tokens():
@@ -117,36 +360,113 @@ def check_tokens():
     return all([PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID])
 
 
+def error_key(error):
+    """Строит ключ ошибки без изменчивых деталей вроде адресов объектов.
+
+    Для обёрнутых ошибок используется тип исходного исключения,
+    а не его текст.
+    """
+    if error.__cause__ is not None:
+        return f'{type(error).__name__}:{type(error.__cause__).__name__}'
+    return f'{type(error).__name__}:{error}'
+
+
+def should_report_error(error, last_error):
+    """Решает, сообщать ли об ошибке.
+
+    Повтор последней отправленной ошибки не сообщается никогда,
+    а чередующиеся ошибки сообщаются не чаще раза в окно.
+    """
+    key = error_key(error)
+    if key == last_error:
+        return False
+    reported_at = _RECENT_ERRORS.get(key)
+    return (reported_at is None
+            or time.time() - reported_at >= ERROR_DEDUP_WINDOW)
+
+
+def remember_reported_error(error):
+    """Запоминает отправленную ошибку и возвращает её ключ."""
+    key = error_key(error)
+    _RECENT_ERRORS[key] = time.time()
+    _RECENT_ERRORS.move_to_end(key)
+    if len(_RECENT_ERRORS) > ERROR_DEDUP_SIZE:
+        _RECENT_ERRORS.popitem(last=False)
+    return key
+
+
+def report_error(bot, error, state):
+    """Сообщает о сбое в Telegram; неудачная отправка только логируется.
+
+    Пропуск запроса разомкнутым предохранителем не сообщается: причина
+    сбоя уже была отправлена, когда предохранитель размыкался.
+    """
+    message = f'Сбой в работе программы: {error}'
+    logger.error(message)
+    if isinstance(error, exceptions.CircuitOpenException):
+        return
+    if not should_report_error(error, state['current_error']):
+        return
+    try:
+        send_message(bot, message)
+    except exceptions.SendMessageException:
+        logger.error('Не удалось сообщить о сбое в Telegram')
+        return
+    state['current_error'] = remember_reported_error(error)
+
+
+def check_homework(context):
+    """Проверяет статус домашки и планирует следующую проверку."""
+    state = context.job.context
+    delay = RETRY_TIME
+    try:
+        reload_practicum_token()
+        response = get_api_answer(state['current_timestamp'])
+        homework = check_response(response)
+        if not len(homework):
+            logger.info('Статус не обновлен')
+        else:
+            homework_status = parse_status(homework[0])
+            if state['current_status'] == homework_status:
+                logger.info(homework_status)
+            else:
+                send_message(context.bot, homework_status)
+                state['current_status'] = homework_status
+        state['current_timestamp'] = response.get(
+            'current_date', state['current_timestamp']
+        )
+        state['attempt'] = 0
+    except Exception as error:
+        delay = backoff_delay(state['attempt'])
+        if isinstance(error, exceptions.RetryAfterException):
+            delay = max(delay, error.retry_after)
+        state['attempt'] += 1
+        report_error(context.bot, error, state)
+    finally:
+        context.job_queue.run_once(check_homework, delay, context=state)
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
         raise ValueError('Проверьте переменные окружения')
 
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
-    current_status = ''
-    current_error = ''
-    while True:
-        try:
-            response = get_api_answer(current_timestamp)
-            homework = check_response(response)
-            if not len(homework):
-                logger.info('Статус не обновлен')
-            else:
-                homework_status = parse_status(homework[0])
-                if current_status == homework_status:
-                    logger.info(homework_status)
-                else:
-                    current_status = homework_status
-                    send_message(bot, homework_status)
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-            if current_error != str(error):
-                current_error = str(error)
-                send_message(bot, message)
-        finally:
-            time.sleep(RETRY_TIME)
+    updater = Updater(
+        token=TELEGRAM_TOKEN,
+        request_kwargs={
+            'connect_timeout': CONNECT_TIMEOUT,
+            'read_timeout': READ_TIMEOUT,
+        },
+    )
+    state = {
+        'current_timestamp': 0,
+        'current_status': '',
+        'current_error': '',
+        'attempt': 0,
+    }
+    updater.job_queue.run_once(check_homework, 0, context=state)
+    updater.start_polling()
+    updater.idle()
 
 
 if __name__ == '__main__':
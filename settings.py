@@ -1,8 +1,30 @@
+from types import MappingProxyType
+
 RETRY_TIME = 600
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+BACKOFF_MAX_DELAY = 3600
+BACKOFF_JITTER = 0.5
+API_RETRY_ATTEMPTS = 5
+RETRY_DELAY_MIN = 2
+RETRY_DELAY_MAX = 4
+RETRIABLE_STATUSES = frozenset({429, 500, 502, 503, 504, 529})
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = BACKOFF_MAX_DELAY * 2
+RESPONSE_CACHE_TTL = RETRY_TIME * 3
+LATENCY_WINDOW = 1024
+LATENCY_REPORT_EVERY = 100
+POOL_CONNECTIONS = 1
+POOL_MAXSIZE = 4
+ERROR_DEDUP_WINDOW = BACKOFF_MAX_DELAY * 6
+ERROR_DEDUP_SIZE = 128
+TELEGRAM_RATE_LIMIT_CALLS = 25
+TELEGRAM_RATE_LIMIT_PERIOD = 1
+TELEGRAM_CHAT_INTERVAL = 1.0
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 
-HOMEWORK_STATUSES = {
+HOMEWORK_STATUSES = MappingProxyType({
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
-}
+})
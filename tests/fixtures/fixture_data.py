@@ -1,4 +1,6 @@
 import random
+import time
+from collections import OrderedDict
 from datetime import datetime
 
 import pytest
@@ -19,3 +21,22 @@ def current_timestamp():
 @pytest.fixture
 def api_url():
     return 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+
+@pytest.fixture(autouse=True)
+def reset_homework_state(monkeypatch):
+    import homework
+
+    monkeypatch.setattr(
+        homework, '_cb', {'state': 'CLOSED', 'fails': 0, 'opened_at': 0}
+    )
+    monkeypatch.setattr(homework, '_LAST_RESPONSE', None)
+    monkeypatch.setattr(homework, '_LAST_TS', 0)
+    monkeypatch.setattr(homework, '_RECENT_ERRORS', OrderedDict())
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(time, 'sleep', calls.append)
+    return calls
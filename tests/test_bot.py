@@ -1,6 +1,10 @@
+import json
 import os
+import time
 from http import HTTPStatus
+from types import SimpleNamespace
 
+import pytest
 import requests
 import telegram
 import utils
@@ -52,6 +56,10 @@ class MockResponseGET:
         }
         return data
 
+    @property
+    def content(self):
+        return json.dumps(self.json()).encode()
+
 
 class MockTelegramBot:
 
@@ -73,6 +81,112 @@ class MockTelegramBot:
         return self.random_timestamp
 
 
+class FailingTelegramBot(MockTelegramBot):
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        raise telegram.error.TelegramError('Telegram недоступен')
+
+
+class MockJobQueue:
+
+    def __init__(self):
+        self.jobs = []
+
+    def run_once(self, callback, when, context=None, **kwargs):
+        self.jobs.append((callback, when, context))
+
+
+def make_state(current_timestamp=0):
+    return {
+        'current_timestamp': current_timestamp,
+        'current_status': '',
+        'current_error': '',
+        'attempt': 0,
+    }
+
+
+def make_job_context(bot, state):
+    return SimpleNamespace(
+        bot=bot, job=SimpleNamespace(context=state), job_queue=MockJobQueue()
+    )
+
+
+class CountingTelegramBot(MockTelegramBot):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.messages = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.messages.append(text)
+        return super().send_message(chat_id=chat_id, text=text, **kwargs)
+
+
+def simulate_outage(monkeypatch, cycles):
+    import homework
+
+    clock = [time.time()]
+
+    def fake_sleep(seconds):
+        clock[0] += seconds
+
+    api_calls = []
+
+    def mock_unreachable_get(*args, **kwargs):
+        api_calls.append(clock[0])
+        raise requests.ConnectionError(
+            f'<HTTPSConnection object at {hex(id(object()))}>'
+        )
+
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+    monkeypatch.setattr(time, 'sleep', fake_sleep)
+    monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+    monkeypatch.setattr(homework.SESSION, 'get', mock_unreachable_get)
+    bot = CountingTelegramBot(token='1234:abcdefg')
+    state = make_state()
+    skipped = 0
+    for _ in range(cycles):
+        calls_before = len(api_calls)
+        context = make_job_context(bot, state)
+        homework.check_homework(context)
+        skipped += len(api_calls) == calls_before
+        _, delay, _ = context.job_queue.jobs[-1]
+        clock[0] += delay
+    return skipped, bot.messages
+
+
+def mock_status_sequence(statuses, random_timestamp, current_timestamp,
+                         headers=None):
+    calls = []
+
+    def mock_response_get(*args, **kwargs):
+        response = MockResponseGET(
+            *args, random_timestamp=random_timestamp,
+            current_timestamp=current_timestamp,
+            http_status=statuses[len(calls)], **kwargs
+        )
+        response.headers = headers or {}
+        calls.append(response.status_code)
+        return response
+
+    return mock_response_get, calls
+
+
+def mock_approved_homework_get(random_timestamp, current_timestamp):
+    def mock_response_get(*args, **kwargs):
+        response = MockResponseGET(
+            *args, random_timestamp=random_timestamp,
+            current_timestamp=current_timestamp, **kwargs
+        )
+        response.json = lambda: {
+            'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+            'current_date': random_timestamp,
+        }
+        return response
+
+    return mock_response_get
+
+
 class TestHomework:
     HOMEWORK_STATUSES = {
         'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -186,10 +300,10 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'get_api_answer'
         utils.check_function(homework, func_name, 1)
 
@@ -232,10 +346,11 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_500_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_500_response_get)
+        monkeypatch.setattr(time, 'sleep', lambda *args: None)
+
         func_name = 'get_api_answer'
         try:
             homework.get_api_answer(current_timestamp)
@@ -315,10 +430,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         status = homework.check_response(response)
@@ -352,10 +467,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -400,10 +515,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -448,10 +563,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'parse_status'
         response = homework.get_api_answer(current_timestamp)
         homeworks = homework.check_response(response)
@@ -484,10 +599,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_no_homeworks_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_no_homeworks_response_get)
+
         func_name = 'check_response'
         result = homework.get_api_answer(current_timestamp)
         try:
@@ -525,10 +640,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         try:
@@ -565,10 +680,10 @@ class TestHomework:
             response.json = valid_response_json
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         response = homework.get_api_answer(current_timestamp)
         try:
@@ -599,10 +714,10 @@ class TestHomework:
             response.json = json_invalid
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_empty_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_empty_response_get)
+
         func_name = 'check_response'
         result = homework.get_api_answer(current_timestamp)
         try:
@@ -626,10 +741,10 @@ class TestHomework:
             )
             return response
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
-
         import homework
 
+        monkeypatch.setattr(homework.SESSION, 'get', mock_response_get)
+
         func_name = 'check_response'
         try:
             homework.get_api_answer(current_timestamp)
@@ -640,3 +755,451 @@ class TestHomework:
                 f'Убедитесь, что в функции `{func_name}` обрабатываете ситуацию, '
                 'когда API возвращает код, отличный от 200'
             )
+
+    def test_backoff_delay_is_monotonic_and_capped(self):
+        import homework
+
+        func_name = 'backoff_delay'
+        for _ in range(100):
+            delays = [homework.backoff_delay(attempt) for attempt in range(12)]
+            assert delays == sorted(delays), (
+                f'Убедитесь, что `{func_name}` не уменьшает паузу '
+                'с ростом числа неудачных попыток'
+            )
+            assert all(
+                homework.RETRY_TIME <= delay <= homework.BACKOFF_MAX_DELAY
+                for delay in delays
+            ), (
+                f'Убедитесь, что пауза `{func_name}` не короче RETRY_TIME '
+                'и не длиннее BACKOFF_MAX_DELAY'
+            )
+
+    def test_get_api_answer_retries_transient_statuses(
+            self, monkeypatch, sleeps, random_timestamp, current_timestamp):
+        import homework
+
+        mock_get, calls = mock_status_sequence(
+            [HTTPStatus.BAD_GATEWAY, HTTPStatus.TOO_MANY_REQUESTS,
+             HTTPStatus.OK],
+            random_timestamp, current_timestamp,
+            headers={'Retry-After': '3'},
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+
+        result = homework.get_api_answer(current_timestamp)
+        assert result['current_date'] == random_timestamp
+        assert calls == [
+            HTTPStatus.BAD_GATEWAY, HTTPStatus.TOO_MANY_REQUESTS,
+            HTTPStatus.OK
+        ], 'Убедитесь, что запрос повторяется при ответах 502 и 429'
+        assert (
+            homework.RETRY_DELAY_MIN <= sleeps[0] <= homework.RETRY_DELAY_MAX
+        )
+        assert sleeps[1] == 3, (
+            'Убедитесь, что при ответе 429 учитывается заголовок Retry-After'
+        )
+
+    def test_long_retry_after_is_deferred_to_next_job(
+            self, monkeypatch, sleeps, random_timestamp, current_timestamp):
+        import exceptions
+        import homework
+
+        mock_get, calls = mock_status_sequence(
+            [HTTPStatus.TOO_MANY_REQUESTS] * 2,
+            random_timestamp, current_timestamp,
+            headers={'Retry-After': '86400'},
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+
+        with pytest.raises(exceptions.RetryAfterException) as error:
+            homework.get_api_answer(current_timestamp)
+        assert error.value.retry_after == 86400
+        assert calls == [HTTPStatus.TOO_MANY_REQUESTS], (
+            'Убедитесь, что долгий Retry-After не выжидается внутри запроса'
+        )
+        assert not sleeps
+
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        state = make_state(current_timestamp)
+        context = make_job_context(
+            MockTelegramBot(token='1234:abcdefg'), state
+        )
+        homework.check_homework(context)
+        _, delay, _ = context.job_queue.jobs[0]
+        assert delay >= 86400, (
+            'Убедитесь, что следующая проверка назначается '
+            'не раньше, чем разрешает Retry-After'
+        )
+
+    @pytest.mark.parametrize(
+        'status', [HTTPStatus.UNAUTHORIZED, HTTPStatus.REQUEST_TIMEOUT]
+    )
+    def test_get_api_answer_fails_fast_on_permanent_statuses(
+            self, monkeypatch, sleeps, status, random_timestamp,
+            current_timestamp):
+        import exceptions
+        import homework
+
+        mock_get, calls = mock_status_sequence(
+            [status], random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+
+        with pytest.raises(exceptions.GetAPIAnswerException):
+            homework.get_api_answer(current_timestamp)
+        assert calls == [status], (
+            f'Убедитесь, что при ответе {status.value} запрос не повторяется'
+        )
+        assert not sleeps
+
+    def test_get_api_answer_serves_cached_response(
+            self, monkeypatch, sleeps, random_timestamp, current_timestamp):
+        import exceptions
+        import homework
+
+        mock_get, _ = mock_status_sequence(
+            [HTTPStatus.OK], random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+        fresh = homework.get_api_answer(current_timestamp)
+
+        def mock_unreachable_get(*args, **kwargs):
+            raise requests.ConnectionError('connection refused')
+
+        monkeypatch.setattr(homework.SESSION, 'get', mock_unreachable_get)
+        assert homework.get_api_answer(current_timestamp) == fresh, (
+            'Убедитесь, что при недоступности API в пределах '
+            'RESPONSE_CACHE_TTL возвращается последний успешный ответ'
+        )
+
+        monkeypatch.setattr(
+            homework, '_LAST_TS',
+            time.time() - homework.RESPONSE_CACHE_TTL - 1
+        )
+        with pytest.raises(exceptions.GetAPIAnswerException):
+            homework.get_api_answer(current_timestamp)
+
+    def test_not_modified_refreshes_cache(self, monkeypatch, random_timestamp,
+                                          current_timestamp):
+        import homework
+
+        mock_get, _ = mock_status_sequence(
+            [HTTPStatus.NOT_MODIFIED], random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+        started = time.time()
+
+        result = homework.get_api_answer(current_timestamp)
+        assert result == {'homeworks': [], 'current_date': current_timestamp}
+        assert homework._LAST_TS >= started, (
+            'Убедитесь, что ответ 304 продлевает срок сохранённого ответа'
+        )
+
+    def test_circuit_opens_after_consecutive_failures(
+            self, monkeypatch, random_timestamp, current_timestamp):
+        import exceptions
+        import homework
+
+        threshold = homework.CIRCUIT_FAILURE_THRESHOLD
+        mock_get, calls = mock_status_sequence(
+            [HTTPStatus.UNAUTHORIZED] * threshold,
+            random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+
+        for _ in range(threshold):
+            with pytest.raises(exceptions.GetAPIAnswerException):
+                homework.get_api_answer(current_timestamp)
+        assert homework._cb['state'] == 'OPEN'
+
+        with pytest.raises(exceptions.CircuitOpenException):
+            homework.get_api_answer(current_timestamp)
+        assert len(calls) == threshold, (
+            'Убедитесь, что при разомкнутом предохранителе '
+            'запрос к API не выполняется'
+        )
+
+    def test_circuit_half_open_probe(self, monkeypatch, sleeps,
+                                     random_timestamp, current_timestamp):
+        import exceptions
+        import homework
+
+        expired = time.time() - homework.CIRCUIT_RESET_TIMEOUT - 1
+        homework._cb.update(
+            state='OPEN',
+            fails=homework.CIRCUIT_FAILURE_THRESHOLD,
+            opened_at=expired,
+        )
+        mock_get, calls = mock_status_sequence(
+            [HTTPStatus.BAD_GATEWAY], random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+        with pytest.raises(exceptions.GetAPIAnswerException):
+            homework.get_api_answer(current_timestamp)
+        assert calls == [HTTPStatus.BAD_GATEWAY], (
+            'Убедитесь, что в полуоткрытом состоянии делается '
+            'ровно одна пробная попытка'
+        )
+        assert not sleeps
+        assert homework._cb['state'] == 'OPEN'
+
+        homework._cb['opened_at'] = expired
+        mock_get, calls = mock_status_sequence(
+            [HTTPStatus.OK], random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+        homework.get_api_answer(current_timestamp)
+        assert homework._cb['state'] == 'CLOSED'
+        assert homework._cb['fails'] == 0
+
+    def test_api_latency_is_recorded_per_request(
+            self, monkeypatch, sleeps, random_timestamp, current_timestamp):
+        import exceptions
+        import homework
+
+        latencies = homework._LATENCIES['api_request']
+        recorded = len(latencies)
+        mock_get, calls = mock_status_sequence(
+            [HTTPStatus.BAD_GATEWAY, HTTPStatus.OK],
+            random_timestamp, current_timestamp
+        )
+        monkeypatch.setattr(homework.SESSION, 'get', mock_get)
+        homework.get_api_answer(current_timestamp)
+        assert len(latencies) == recorded + len(calls), (
+            'Убедитесь, что замеряется каждый запрос к API отдельно'
+        )
+
+        homework._cb.update(state='OPEN', opened_at=time.time())
+        with pytest.raises(exceptions.CircuitOpenException):
+            homework.get_api_answer(current_timestamp)
+        assert len(latencies) == recorded + len(calls)
+
+    def test_chat_throttle_is_not_timed(self, monkeypatch, random_timestamp):
+        import homework
+
+        clock = [0.0]
+        monkeypatch.setattr(time, 'perf_counter', lambda: clock[0])
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        monkeypatch.setattr(time, 'sleep', fake_sleep)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        monkeypatch.setattr(
+            homework, '_LAST_SEND_TS', {12345: time.monotonic()}
+        )
+        bot = MockTelegramBot(token='1234:abcdefg',
+                              random_timestamp=random_timestamp)
+
+        homework.send_message(bot, 'Тест')
+        assert clock[0] > 0, 'Ожидалась пауза между сообщениями в один чат'
+        assert homework._LATENCIES['telegram_send'][-1] == 0, (
+            'Убедитесь, что пауза между сообщениями не учитывается '
+            'в задержке отправки в Telegram'
+        )
+
+    def test_check_homework_advances_from_date(
+            self, monkeypatch, sleeps, random_timestamp, current_timestamp):
+        import homework
+
+        monkeypatch.setattr(
+            homework.SESSION, 'get',
+            mock_approved_homework_get(random_timestamp, current_timestamp)
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        state = make_state(current_timestamp)
+        bot = MockTelegramBot(token='1234:abcdefg',
+                              random_timestamp=random_timestamp)
+        context = make_job_context(bot, state)
+
+        homework.check_homework(context)
+        assert state['current_timestamp'] == random_timestamp
+        assert state['current_status']
+        assert len(context.job_queue.jobs) == 1
+
+    def test_failed_send_does_not_advance_from_date(
+            self, monkeypatch, sleeps, random_timestamp, current_timestamp):
+        import homework
+
+        monkeypatch.setattr(
+            homework.SESSION, 'get',
+            mock_approved_homework_get(random_timestamp, current_timestamp)
+        )
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        state = make_state(current_timestamp)
+        context = make_job_context(
+            FailingTelegramBot(token='1234:abcdefg'), state
+        )
+
+        homework.check_homework(context)
+        assert state['current_timestamp'] == current_timestamp, (
+            'Убедитесь, что from_date не сдвигается, '
+            'если уведомление об изменении статуса не отправлено'
+        )
+        assert state['current_status'] == '', (
+            'Убедитесь, что статус не запоминается, '
+            'если уведомление не отправлено'
+        )
+        assert len(context.job_queue.jobs) == 1, (
+            'Убедитесь, что следующая проверка планируется даже после сбоя'
+        )
+
+    def test_alternating_errors_are_suppressed_within_window(
+            self, monkeypatch):
+        import homework
+
+        now = [1000.0]
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        first, second = ValueError('Сбой'), KeyError('Сбой')
+
+        assert homework.should_report_error(first, '')
+        last_error = homework.remember_reported_error(first)
+        assert homework.should_report_error(second, last_error)
+        last_error = homework.remember_reported_error(second)
+        assert not homework.should_report_error(first, last_error), (
+            'Убедитесь, что чередующаяся ошибка не отправляется '
+            'в пределах ERROR_DEDUP_WINDOW'
+        )
+        now[0] += homework.ERROR_DEDUP_WINDOW + 1
+        assert homework.should_report_error(first, last_error), (
+            'Убедитесь, что ошибка отправляется снова '
+            'после окончания ERROR_DEDUP_WINDOW'
+        )
+
+    def test_last_error_is_never_resent(self, monkeypatch):
+        import homework
+
+        now = [1000.0]
+        monkeypatch.setattr(time, 'time', lambda: now[0])
+        error = ValueError('Сбой')
+        last_error = homework.remember_reported_error(error)
+        now[0] += homework.ERROR_DEDUP_WINDOW * 10
+        assert not homework.should_report_error(error, last_error), (
+            'Убедитесь, что повтор последней ошибки не отправляется'
+        )
+
+    def test_error_reports_are_bounded(self):
+        import homework
+
+        size = homework.ERROR_DEDUP_SIZE
+        for number in range(size + 1):
+            homework.remember_reported_error(ValueError(number))
+        assert len(homework._RECENT_ERRORS) == size
+        assert homework.should_report_error(ValueError(0), ''), (
+            'Убедитесь, что самая старая ошибка вытесняется '
+            'при переполнении ERROR_DEDUP_SIZE'
+        )
+
+    def test_network_errors_share_report_key(self, monkeypatch, sleeps,
+                                             current_timestamp):
+        import exceptions
+        import homework
+
+        def mock_unreachable_get(*args, **kwargs):
+            raise requests.ConnectionError(
+                f'<HTTPSConnection object at {hex(id(object()))}>'
+            )
+
+        monkeypatch.setattr(homework.SESSION, 'get', mock_unreachable_get)
+        keys = set()
+        for _ in range(2):
+            with pytest.raises(exceptions.GetAPIAnswerException) as error:
+                homework.get_api_answer(current_timestamp)
+            keys.add(homework.error_key(error.value))
+        assert len(keys) == 1, (
+            'Убедитесь, что однотипные сетевые сбои с разным текстом '
+            'дают один ключ ошибки'
+        )
+
+    def test_sustained_outage_is_reported_once(self, monkeypatch):
+        _, messages = simulate_outage(monkeypatch, cycles=20)
+        assert len(messages) == 1, (
+            'Убедитесь, что при длительном сбое сообщение об ошибке '
+            'отправляется один раз'
+        )
+
+    def test_undelivered_error_is_not_remembered(self, monkeypatch, sleeps):
+        import homework
+
+        def mock_unreachable_get(*args, **kwargs):
+            raise requests.ConnectionError('connection refused')
+
+        monkeypatch.setattr(homework.SESSION, 'get', mock_unreachable_get)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        state = make_state()
+        context = make_job_context(
+            FailingTelegramBot(token='1234:abcdefg'), state
+        )
+
+        homework.check_homework(context)
+        assert state['current_error'] == ''
+        assert not homework._RECENT_ERRORS, (
+            'Убедитесь, что неотправленная ошибка не считается сообщённой'
+        )
+
+    def test_check_homework_reloads_practicum_token(
+            self, monkeypatch, random_timestamp, current_timestamp):
+        import homework
+
+        headers = []
+        mock_get, _ = mock_status_sequence(
+            [HTTPStatus.OK], random_timestamp, current_timestamp
+        )
+
+        def mock_recording_get(*args, **kwargs):
+            headers.append(kwargs.get('headers'))
+            return mock_get(*args, **kwargs)
+
+        monkeypatch.setattr(homework.SESSION, 'get', mock_recording_get)
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'old')
+        monkeypatch.setattr(
+            homework, 'dotenv_values', lambda: {'PRACTICUM_TOKEN': 'new'}
+        )
+        state = make_state(current_timestamp)
+        homework.check_homework(make_job_context(None, state))
+        assert headers[0]['Authorization'] == 'OAuth new', (
+            'Убедитесь, что обновлённый PRACTICUM_TOKEN '
+            'подхватывается без перезапуска'
+        )
+
+    def test_check_homework_reschedules_when_env_reload_fails(
+            self, monkeypatch, sleeps):
+        import homework
+
+        def broken_dotenv_values():
+            raise PermissionError('.env')
+
+        monkeypatch.setattr(homework, 'dotenv_values', broken_dotenv_values)
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 12345)
+        state = make_state()
+        context = make_job_context(
+            MockTelegramBot(token='1234:abcdefg'), state
+        )
+
+        homework.check_homework(context)
+        assert len(context.job_queue.jobs) == 1, (
+            'Убедитесь, что сбой чтения .env не останавливает опрос'
+        )
+        assert state['attempt'] == 1
+
+    def test_get_api_answer_wraps_undecodable_body(self, monkeypatch,
+                                                   current_timestamp):
+        import exceptions
+        import homework
+
+        def mock_binary_get(*args, **kwargs):
+            return SimpleNamespace(
+                status_code=HTTPStatus.OK, content=b'\x80abc', headers={}
+            )
+
+        monkeypatch.setattr(homework, 'orjson', json)
+        monkeypatch.setattr(homework.SESSION, 'get', mock_binary_get)
+        with pytest.raises(exceptions.GetAPIAnswerException):
+            homework.get_api_answer(current_timestamp)
+
+    def test_circuit_skips_polls_during_outage(self, monkeypatch):
+        skipped, _ = simulate_outage(monkeypatch, cycles=20)
+        assert skipped, (
+            'Убедитесь, что при длительном сбое разомкнутый предохранитель '
+            'пропускает часть запросов к API'
+        )